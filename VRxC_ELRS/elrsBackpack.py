@@ -2,9 +2,11 @@ import logging
 import hashlib
 import serial
 import time
-import copy
+import heapq
+import itertools
 
-from threading import Thread, Lock
+from threading import Thread, Lock, Condition
+from dataclasses import dataclass, replace
 import queue
 import serial.tools.list_ports
 import gevent
@@ -15,78 +17,204 @@ from VRxControl import VRxController
 import util.RH_GPIO as RH_GPIO
 
 from plugins.VRxC_ELRS.hardware import HARDWARE_SETTINGS
-from plugins.VRxC_ELRS.msp import msptypes, msp_message
+from plugins.VRxC_ELRS.options import OPTION_FIELDS
+from plugins.VRxC_ELRS.msp import msptypes, msp_message, crc8_dvb_s2
 
 logger = logging.getLogger(__name__)
 
+MSP_REQUEST_HEADER = b'$X<'
+MSP_RESPONSE_HEADER = b'$X>'
+
+# Packets from the backpack carry a few bytes; a longer length means a false header
+MSP_MAX_PAYLOAD_SIZE = 256
+
+# MD5 state primed with the constant prefix of the hashed bindphrase define
+BINDING_PHRASE_MD5 = hashlib.md5(b'-DMY_BINDING_PHRASE="')
+
+# USB vendor IDs of the ESP32 boards and USB-serial bridges the backpack runs on
+BACKPACK_USB_VIDS = frozenset((
+    0x303A, # Espressif
+    0x10C4, # Silicon Labs CP210x
+    0x1A86, # WCH CH340/CH9102
+    0x0403, # FTDI
+))
+
+BACKPACK_BAUDRATE = 460800
+
+# Queued bursts are coalesced up to this many bytes per write, well
+# inside the tty buffer so a write can't outlast its timeout
+WRITE_BATCH_SIZE = 1024
+
+#
+# Snapshot of the plugin's options
+#
+
+@dataclass(frozen=True)
+class osdConfig():
+
+    race_control: bool
+
+    heat_name: bool
+    position_mode: bool
+    gap_mode: bool
+    results_mode: bool
+
+    racestage_message: str
+    racestart_message: str
+    pilotdone_message: str
+    racefinish_message: str
+    racestop_message: str
+    leader_message: str
+
+    racestart_uptime: float
+    finish_uptime: float
+    results_uptime: float
+    announcement_uptime: float
+
+    status_row: int
+    currentlap_row: int
+    lapresults_row: int
+    announcement_row: int
+
+#
+# Per-pilot backpack settings
+#
+
+@dataclass(frozen=True)
+class pilotSettings():
+
+    hardware_type: str
+    column_size: int
+    row_size: int
+    half_row: int
+
+    UID: bytes
+    frame_set_uid: bytes
+    frame_clear_row: dict
+
+#
+# Post-race results rows: label at column 11, padded out to the value at column 30
+#
+
+RESULT_LABEL_WIDTH = 19
+
+def result_label(label):
+    # Zero bytes are blank cells, the same as a cleared row
+    return label.ljust(RESULT_LABEL_WIDTH, '\x00')
+
+PLACEMENT_LABEL = result_label('PLACEMENT:')
+LAPS_COMPLETED_LABEL = result_label('LAPS COMPLETED:')
+FASTEST_LAP_LABEL = result_label('FASTEST LAP:')
+TOTAL_TIME_LABEL = result_label('TOTAL TIME:')
+
+#
+# Prebuilt MSP frames
+#
+
+def msp_frame(function, payload=b'') -> bytes:
+    message = msp_message()
+    message.set_function(function)
+    message.set_payload(payload)
+    return message.get_msp()
+
+# Frames that are the same for every pilot and every event
+CLEAR_SEND_UID_FRAME = msp_frame(msptypes.MSP_ELRS_SET_SEND_UID, b'\x00')
+OSD_CLEAR_FRAME = msp_frame(msptypes.MSP_ELRS_SET_OSD, b'\x02')
+OSD_DISPLAY_FRAME = msp_frame(msptypes.MSP_ELRS_SET_OSD, b'\x04')
+
+GET_VERSION_FRAME = msp_frame(msptypes.MSP_ELRS_GET_BACKPACK_VERSION)
+BIND_MODE_FRAME = msp_frame(msptypes.MSP_ELRS_BACKPACK_SET_MODE, b'B')
+WIFI_MODE_FRAME = msp_frame(msptypes.MSP_ELRS_BACKPACK_SET_MODE, b'W')
+
+# Fields that decide how the current lap row is drawn
+LAP_MSG_FIELDS = frozenset(('currentlap_row', 'position_mode'))
+
 class elrsBackpack(VRxController):
     
-    _queue_lock = Lock()
+    _config_lock = Lock()
     _connector_status_lock = Lock()
 
     _backpack_connected = False
     
-    _heat_name = None
+    _cfg = None
     _heat_data = {}
-    _finished_pilots = []
+    _active_pilots = ()
     _queue_full = False
 
     def __init__(self, name, label, rhapi):
         super().__init__(name, label)
         self._rhapi = rhapi
 
+        self._pilot_settings = {}
+        self._finished_pilots = set()
+        self._lap_msgs = {}
+        self._clear_row_frames = {}
+        self._phrase_UIDs = {}
+
+        self._inbound_handlers = {
+            msptypes.MSP_ELRS_BACKPACK_SET_RECORDING_STATE: self.on_recording_state,
+        }
+
         self._backpack_queue = queue.Queue(maxsize=200)
         Thread(target=self.backpack_connector, daemon=True).start()
 
+        self._scheduled_frames = []
+        self._scheduled_count = itertools.count()
+        self._scheduler_cond = Condition()
+        self._test_osd_frames = []
+        Thread(target=self.frame_scheduler, daemon=True).start()
+
     def registerHandlers(self, args):
         args['register_fn'](self)
 
-    def setOptions(self, _args = None):
+    def setOptions(self, args = None):
 
-        with self._queue_lock:
+        if args:
+            name = args.get('option')
+            option_field = OPTION_FIELDS.get(name)
+            # Not one of the OSD options
+            if option_field is None:
+                return
 
-            if self._rhapi.db.option('_heat_name') == "1":
-                self._heat_name = True
-            else:
-                self._heat_name = False
-            if self._rhapi.db.option('_position_mode') == "1":
-                self._position_mode = True
-            else:
-                self._position_mode = False
-            if self._rhapi.db.option('_gap_mode') == "1":
-                self._gap_mode = True
-            else:
-                self._gap_mode = False
-            if self._rhapi.db.option('_results_mode') == "1":
-                self._results_mode = True
-            else:
-                self._results_mode = False
+        with self._config_lock:
+            option = self._rhapi.db.option
+
+            # A single option changed: only refresh its field
+            if args and self._cfg:
+                field, convert = option_field
+                value = convert(option(name))
+                if getattr(self._cfg, field) != value:
+                    self._cfg = replace(self._cfg, **{field: value})
+                    # The skipped lap rows were drawn with the old layout
+                    if field in LAP_MSG_FIELDS:
+                        self._lap_msgs = {}
+                return
 
-            self._racestage_message = self._rhapi.db.option('_racestage_message')
-            self._racestart_message = self._rhapi.db.option('_racestart_message')
-            self._pilotdone_message = self._rhapi.db.option('_pilotdone_message')
-            self._racefinish_message = self._rhapi.db.option('_racefinish_message')
-            self._racestop_message = self._rhapi.db.option('_racestop_message')
-            self._leader_message = self._rhapi.db.option('_leader_message')
+            self._cfg = osdConfig(**{
+                field: convert(option(name)) for name, (field, convert) in OPTION_FIELDS.items()
+            })
+            self._lap_msgs = {}
 
-            self._racestart_uptime = self._rhapi.db.option('_racestart_uptime') * 1e-1
-            self._finish_uptime = self._rhapi.db.option('_finish_uptime') * 1e-1
-            self._results_uptime = self._rhapi.db.option('_results_uptime') * 1e-1
-            self._announcement_uptime = self._rhapi.db.option('_announcement_uptime') * 1e-1
+    def onDatabaseChange(self, args):
+        # A reset or restore replaces options without sending OPTION_SET,
+        # so drop the snapshot and let get_config reload it
+        with self._config_lock:
+            self._cfg = None
+        self.reset_pilot_settings()
 
-            self._status_row = self._rhapi.db.option('_status_row')
-            self._currentlap_row = self._rhapi.db.option('_currentlap_row')
-            self._lapresults_row = self._rhapi.db.option('_lapresults_row')
-            self._announcement_row = self._rhapi.db.option('_announcement_row')
+    def get_config(self) -> osdConfig:
+        if self._cfg is None:
+            self.setOptions()
+        return self._cfg
 
     def start_race(self):
-        if self._rhapi.db.option('_race_control') == '1':
+        if self.get_config().race_control:
             start_race_args = {'start_time_s' : 10}
             if self._rhapi.race.status == RaceStatus.READY:
                 self._rhapi.race.stage(start_race_args)
 
     def stop_race(self):
-        if self._rhapi.db.option('_race_control') == '1':
+        if self.get_config().race_control:
             status = self._rhapi.race.status
             if status == RaceStatus.STAGING or status == RaceStatus.RACING:
                 self._rhapi.race.stop()
@@ -106,151 +234,242 @@ class elrsBackpack(VRxController):
     def combine_bytes(self, a, b):
         return (b << 8) | a
 
-    def backpack_connector(self):
-        version = msp_message()
-        version.set_function(msptypes.MSP_ELRS_GET_BACKPACK_VERSION)
-        version_message = version.get_msp()
-        
-        logger.info("Attempting to find backpack")
-        
-        ports = list(serial.tools.list_ports.comports())
-        s = serial.Serial(baudrate=460800,
+    def probe_port(self, device, version_message):
+        s = serial.Serial(baudrate=BACKPACK_BAUDRATE,
                         bytesize=8, parity='N', stopbits=1,
                         timeout=0.01, xonxoff=0, rtscts=0,
                         write_timeout=0.01)
+        s.port = device
         
-        #
-        # Search for connected backpack
-        #
+        try:
+            s.open()
+        except serial.SerialException:
+            logger.warning(f'Failed to open serial device {device}. Attempting to connect to new device...')
+            return None
+        
+        time.sleep(1.5) # Needed for connecting to DevKitC
 
+        try:
+            s.write(version_message)
+        except serial.SerialException:
+            logger.error(f'Failed to write to open serial device {device}. Attempting to connect to new device...')
+            s.close()
+            return None
+
+        response = s.read(8)
+        if len(response) == 8:
+            logger.debug('Device response: %r', response)
+            if response[:3] == MSP_RESPONSE_HEADER:
+                mode = self.combine_bytes(response[4], response[5])
+                response_payload_length = self.combine_bytes(response[6], response[7])
+                response_payload = s.read(response_payload_length)
+                response_check_sum = s.read(1)
+
+                if mode == msptypes.MSP_ELRS_BACKPACK_SET_MODE or mode == msptypes.MSP_ELRS_GET_BACKPACK_VERSION:
+                    logger.info(f"Connected to backpack on {device}")
+
+                    version = response_payload.split(b'\x00', 1)[0].decode('utf-8', errors='replace')
+                    logger.info(f"Backpack version: {version}")
+                    return s
+                
+                else:
+                    logger.warning(f"Unexpected response from {device}, trying next port...")
+            else:
+                logger.warning(f"Unrecongnized response from {device}, trying next port...")
+        else:
+            logger.warning(f"Bad response from {device}, trying next port...")
+
+        s.close()
+        return None
+
+    def find_backpack(self, ports, version_message):
+        # One port at a time, stopping at the first backpack: opening a port
+        # toggles DTR, which resets other devices such as the timer nodes
         for port in ports:
-            s.port = port.device
-            
-            try:
-                s.open()
-            except:
-                logger.warning('Failed to open serial device. Attempting to connect to new device...')
-                continue
-            
-            time.sleep(1.5) # Needed for connecting to DevKitC
+            s = self.probe_port(port.device, version_message)
+            if s is not None:
+                return s
 
-            try:
-                s.write(version_message)
-            except:
-                logger.error('Failed to write to open serial device. Attempting to connect to new device...')
-                s.close()
-                continue
+        return None
 
-            response = list(s.read(8))
-            if len(response) == 8:
-                logger.info(f'Device response: {response}')
-                if response[:3] == [ord('$'),ord('X'),ord('>')]:
-                    mode = self.combine_bytes(response[4], response[5])
-                    response_payload_length = self.combine_bytes(response[6], response[7])
-                    response_payload = list(s.read(response_payload_length))
-                    response_check_sum = list(s.read(1))
+    def backpack_connector(self):
+        version_message = GET_VERSION_FRAME
+        
+        logger.info("Attempting to find backpack")
+        
+        #
+        # Search for connected backpack
+        #
 
-                    if mode == msptypes.MSP_ELRS_BACKPACK_SET_MODE or mode == msptypes.MSP_ELRS_GET_BACKPACK_VERSION:
-                        logger.info(f"Connected to backpack on {port.device}")
+        ports = list(serial.tools.list_ports.comports())
+        likely_ports = [port for port in ports if port.vid in BACKPACK_USB_VIDS]
+        other_ports = [port for port in ports if port.vid not in BACKPACK_USB_VIDS]
 
-                        version_list = [chr(val) for val in response_payload]
-                        logger.info(f"Backpack version: {''.join(version_list)}")
+        s = self.find_backpack(likely_ports, version_message)
+        if s is None:
+            s = self.find_backpack(other_ports, version_message)
 
-                        with self._connector_status_lock:
-                            self._backpack_connected = True
-                        break
-                    
-                    else:
-                        logger.warning(f"Unexpected response from {port.device}, trying next port...")
-                        s.close()
-                        continue
-                else:
-                    logger.warning(f"Unrecongnized response from {port.device}, trying next port...")
-                    s.close()
-                    continue
-            else:
-                logger.warning(f"Bad response from {port.device}, trying next port...")
-                s.close()
-                continue
-        else:
-            logger.warning("Could not find connected backpack. Ending connector thread.")
-            with self._connector_status_lock:
+        with self._connector_status_lock:
+            if s is None:
+                logger.warning("Could not find connected backpack. Ending connector thread.")
                 self._backpack_connected = False
+            else:
+                self._backpack_connected = True
 
         #
         # Backpack connection loop
         #
 
-        with self._connector_status_lock:
-            backpack_connected = copy.copy(self._backpack_connected)
+        if s is None:
+            return
+
+        # Leave time for a full batch to go out on the wire (10 bits per byte)
+        s.write_timeout = 0.01 + WRITE_BATCH_SIZE * 10 / BACKPACK_BAUDRATE
+        Thread(target=self.backpack_reader, args=(s,), daemon=True).start()
         
         error_count = 0
-        while backpack_connected:
+        messages = []
+        while True:
 
             # Handle backpack comms 
-            while not self._backpack_queue.empty():
-                message = self._backpack_queue.get()
-                s.flush()
-                
-                try:
-                    s.write(message)
-                except:
-                    error_count += 1
-                    if error_count > 5:
-                        logger.error('Failed to write to backpack. Ending connector thread')
-                        s.close()
-                        with self._connector_status_lock:
-                            self._backpack_connected = False
-                        return
-                else:
-                    error_count = 0
-
-            packet = list(s.read(8))
-            if len(packet) == 8:
-                if packet[:3] == [ord('$'),ord('X'),ord('<')]:
-                    mode = self.combine_bytes(packet[4], packet[5])
-                    payload_length = self.combine_bytes(packet[6], packet[7])
-                    payload = list(s.read(payload_length))
-                    check_sum = list(s.read(1))
-
-                    # Monitor SET_RECORDING_STATE for controlling race
-                    if mode == msptypes.MSP_ELRS_BACKPACK_SET_RECORDING_STATE:
-                        if payload[0] == 0x00:
-                            gevent.spawn(self.stop_race)
-                        elif payload[0] == 0x01:
-                            gevent.spawn(self.start_race)
-            
-            with self._connector_status_lock:
-                backpack_connected = copy.copy(self._backpack_connected)
+            if not messages:
+                messages += self._backpack_queue.get()
+                while True:
+                    try:
+                        messages += self._backpack_queue.get_nowait()
+                    except queue.Empty:
+                        break
+
+            batch_size = 0
+            count = 0
+            for message in messages:
+                if count and batch_size + len(message) > WRITE_BATCH_SIZE:
+                    break
+                batch_size += len(message)
+                count += 1
+            batch = b''.join(messages[:count])
+            del messages[:count]
+
+            s.flush()
+
+            try:
+                s.write(batch)
+            except serial.SerialException:
+                error_count += 1
+                if error_count > 5:
+                    logger.error('Failed to write to backpack. Ending connector thread')
+                    with self._connector_status_lock:
+                        self._backpack_connected = False
+                    s.close()
+                    return
+            else:
+                error_count = 0
+
+    def backpack_reader(self, s):
+        buffer = b''
+        last_data = time.monotonic()
+        while True:
+            try:
+                # Only read what has arrived, so a native read never blocks the server
+                waiting = s.in_waiting
+                data = s.read(waiting) if waiting else b''
+            except (serial.SerialException, OSError, TypeError):
+                # Port was closed by the connector thread (pyserial raises
+                # TypeError if the descriptor vanishes mid-read)
+                return
+
+            if data:
+                buffer += data
+                last_data = time.monotonic()
+            elif buffer and time.monotonic() - last_data > 0.1:
+                # The rest of a partial packet never came, so its header was
+                # false; look for the next one past it
+                buffer = buffer[1:]
+            else:
+                time.sleep(0.01)
+                continue
+
+            while True:
+                # Skip anything before the header, e.g. ESP32 boot output
+                start = buffer.find(MSP_REQUEST_HEADER)
+                if start < 0:
+                    buffer = buffer[-2:]
+                    break
+                buffer = buffer[start:]
+                if len(buffer) < 8:
+                    break
+
+                payload_length = self.combine_bytes(buffer[6], buffer[7])
+                if payload_length > MSP_MAX_PAYLOAD_SIZE:
+                    buffer = buffer[1:]
+                    continue
+
+                packet_length = 8 + payload_length + 1
+                if len(buffer) < packet_length:
+                    break
+
+                packet = buffer[:packet_length]
+                if crc8_dvb_s2(packet[3:-1]) != packet[-1]:
+                    buffer = buffer[1:]
+                    continue
+                buffer = buffer[packet_length:]
+
+                mode = self.combine_bytes(packet[4], packet[5])
+                handler = self._inbound_handlers.get(mode)
+                if handler:
+                    handler(packet[8:-1])
 
-            time.sleep(0.01)
+    def on_recording_state(self, payload):
+        # Monitor SET_RECORDING_STATE for controlling race
+        if payload[:1] == b'\x00':
+            gevent.spawn(self.stop_race)
+        elif payload[:1] == b'\x01':
+            gevent.spawn(self.start_race)
 
     #
     # Backpack message generation
     #
 
-    def hash_phrase(self, bindphrase:str) -> list:
-        bindingPhraseHash = [x for x in hashlib.md5(("-DMY_BINDING_PHRASE=\"" + bindphrase + "\"").encode()).digest()[0:6]]
-        if (bindingPhraseHash[0] % 2) == 1:
-            bindingPhraseHash[0] -= 0x01
-        return bindingPhraseHash
+    def hash_phrase(self, bindphrase:str) -> bytes:
+        UID = self._phrase_UIDs.get(bindphrase)
+        if UID is not None:
+            return UID
+
+        md5 = BINDING_PHRASE_MD5.copy()
+        md5.update(bindphrase.encode())
+        md5.update(b'"')
+        bindingPhraseHash = bytearray(md5.digest()[0:6])
+        bindingPhraseHash[0] &= 0xFE
+
+        UID = bytes(bindingPhraseHash)
+        self._phrase_UIDs[bindphrase] = UID
+        return UID
     
-    def centerOSD(self, stringlength, hardwaretype):
-        offset = int(stringlength/2)
-        if hardwaretype:
-            col = int(HARDWARE_SETTINGS[hardwaretype]['row_size'] / 2) - offset
-            if col < 0:
-                col = 0
-        else:
+    def centerOSD(self, stringlength, pilot_settings:pilotSettings):
+        col = pilot_settings.half_row - stringlength // 2
+        if col < 0:
             col = 0
         return col
 
-    def queue_add(self, msp):
+    def centered_msg(self, row, message, pilot_settings:pilotSettings, msgs:dict, full_row=False) -> bytes:
+        # Pilots with the same row size get the same frame, so build it once per event
+        row_size = pilot_settings.row_size
+        frame = msgs.get(row_size)
+        if frame is None:
+            start_col = self.centerOSD(len(message), pilot_settings)
+            if full_row:
+                frame = self.osd_row_frame(row, start_col, message, pilot_settings)
+            else:
+                frame = self.osd_text_frame(row, start_col, message)
+            msgs[row_size] = frame
+        return frame
+
+    def queue_add(self, frames:tuple):
         with self._connector_status_lock:
             if self._backpack_connected is False:
                 return
         try:
-            self._backpack_queue.put(msp, block=False)
+            self._backpack_queue.put(frames, block=False)
         except queue.Full:
             if self._queue_full is False:
                 self._queue_full = True
@@ -263,69 +482,137 @@ class elrsBackpack(VRxController):
                 self._rhapi.ui.message_notify(self._rhapi.language.__(message))
     
     def send_msp(self, msp):
-        self.queue_add(msp)
+        self.queue_add((msp,))
+
+    def send_frames(self, frames:list):
+        if frames:
+            self.queue_add(tuple(frames))
+
+    def send_frames_later(self, delay, frames:list):
+        if not frames:
+            return
+        deadline = time.monotonic() + delay
+        entry = (deadline, next(self._scheduled_count), frames)
+        with self._scheduler_cond:
+            heapq.heappush(self._scheduled_frames, entry)
+            self._scheduler_cond.notify()
+        return entry
+
+    def cancel_frames_later(self, entries:list):
+        # send_frames_later returns None when it had nothing to schedule
+        cancelled = {entry[1] for entry in entries if entry is not None}
+        if not cancelled:
+            return
+        with self._scheduler_cond:
+            self._scheduled_frames = [
+                entry for entry in self._scheduled_frames if entry[1] not in cancelled
+            ]
+            heapq.heapify(self._scheduled_frames)
+            self._scheduler_cond.notify()
+
+    def frame_scheduler(self):
+        while True:
+            with self._scheduler_cond:
+                while not self._scheduled_frames:
+                    self._scheduler_cond.wait()
+
+                delay = self._scheduled_frames[0][0] - time.monotonic()
+                if delay > 0:
+                    self._scheduler_cond.wait(delay)
+                    continue
+
+                # Send everything that has come due together
+                now = time.monotonic()
+                frames = []
+                while self._scheduled_frames and self._scheduled_frames[0][0] <= now:
+                    frames += heapq.heappop(self._scheduled_frames)[2]
+
+            self.send_frames(frames)
             
-    def set_sendUID(self, bindingHash:list):
+    def set_uid_frame(self, bindingHash:bytes) -> bytes:
         message = msp_message()
         message.set_function(msptypes.MSP_ELRS_SET_SEND_UID)
-        message.set_payload([1] + bindingHash)
-        self.send_msp(message.get_msp())
+        message.set_payload(b'\x01' + bindingHash)
+        return message.get_msp()
 
-    def clear_sendUID(self):
-        message = msp_message()
-        message.set_function(msptypes.MSP_ELRS_SET_SEND_UID)
-        message.set_payload([0])
-        self.send_msp(message.get_msp())
+    def osd_text_frame(self, row, col, str) -> bytes:
+        payload = bytes((0x03,row,col,0)) + str.encode('latin-1', errors='replace')
 
-    def send_clear(self):
         message = msp_message()
         message.set_function(msptypes.MSP_ELRS_SET_OSD)
-        message.set_payload([0x02])
-        self.send_msp(message.get_msp())
+        message.set_payload(payload)
+        return message.get_msp()
 
-    def send_msg(self, row, col, str):
-        payload = [0x03,row,col,0]
-        for x in [*str]:
-            payload.append(ord(x))
+    def osd_row_frame(self, row, col, str, pilot_settings:pilotSettings) -> bytes:
+        # Writes the whole row, blank around the text, so no separate row clear is needed
+        text = str.encode('latin-1', errors='replace')
+        padding = max(0, pilot_settings.row_size - col - len(text))
+        payload = bytes((0x03,row,0,0)) + bytes(col) + text + bytes(padding)
 
         message = msp_message()
         message.set_function(msptypes.MSP_ELRS_SET_OSD)
         message.set_payload(payload)
-        self.send_msp(message.get_msp())
+        return message.get_msp()
 
-    def send_display(self):
-        message = msp_message()
-        message.set_function(msptypes.MSP_ELRS_SET_OSD)
-        message.set_payload([0x04])
-        self.send_msp(message.get_msp())
-    
-    def send_clear_row(self, row, hardwaretype):
-        payload = [0x03,row,0,0]
-        for x in range(HARDWARE_SETTINGS[hardwaretype]['row_size']):
-            payload.append(0)
+    def result_row_frame(self, row, label, value) -> bytes:
+        # Label is already padded to RESULT_LABEL_WIDTH
+        return self.osd_text_frame(row, 11, label + str(value))
+
+    def clear_row_frame(self, row, row_size) -> bytes:
+        payload = bytes((0x03,row,0,0)) + bytes(row_size)
 
         message = msp_message()
         message.set_function(msptypes.MSP_ELRS_SET_OSD)
         message.set_payload(payload)
-        self.send_msp(message.get_msp())
+        return message.get_msp()
+
+    def make_pilot_settings(self, hardware_type, UID:bytes=None) -> pilotSettings:
+        hardware = HARDWARE_SETTINGS[hardware_type]
+        return pilotSettings(
+            hardware_type = hardware_type,
+            column_size = hardware['column_size'],
+            row_size = hardware['row_size'],
+            half_row = hardware['row_size'] // 2,
+            UID = UID,
+            frame_set_uid = self.set_uid_frame(UID) if UID else None,
+            frame_clear_row = self.clear_row_frames(hardware_type),
+        )
+
+    def clear_row_frames(self, hardware_type) -> dict:
+        # Clear-row frames only depend on the hardware, so pilots share them
+        frames = self._clear_row_frames.get(hardware_type)
+        if frames is None:
+            hardware = HARDWARE_SETTINGS[hardware_type]
+            frames = {
+                row : self.clear_row_frame(row, hardware['row_size'])
+                for row in range(hardware['column_size'])
+            }
+            self._clear_row_frames[hardware_type] = frames
+        return frames
+
+    def pilot_clear_row(self, pilot_settings:pilotSettings, row) -> bytes:
+        frame = pilot_settings.frame_clear_row.get(row)
+        if frame is None:
+            frame = self.clear_row_frame(row, pilot_settings.row_size)
+        return frame
+
+    def pilot_burst(self, pilot_settings:pilotSettings, *frames) -> bytes:
+        return b''.join((
+            pilot_settings.frame_set_uid,
+            *frames,
+            OSD_DISPLAY_FRAME,
+            CLEAR_SEND_UID_FRAME,
+        ))
 
     def activate_bind(self, _args):
         message = "Activating backpack's bind mode..."
         self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-        message = msp_message()
-        message.set_function(msptypes.MSP_ELRS_BACKPACK_SET_MODE)
-        message.set_payload([ord('B')])
-        with self._queue_lock:
-            self.send_msp(message.get_msp())
+        self.send_msp(BIND_MODE_FRAME)
     
     def activate_wifi(self, _args):
         message = "Turning on backpack's wifi..."
         self._rhapi.ui.message_notify(self._rhapi.language.__(message))
-        message = msp_message()
-        message.set_function(msptypes.MSP_ELRS_BACKPACK_SET_MODE)
-        message.set_payload([ord('W')])
-        with self._queue_lock:
-            self.send_msp(message.get_msp())
+        self.send_msp(WIFI_MODE_FRAME)
 
     #
     # Connection Test
@@ -333,365 +620,369 @@ class elrsBackpack(VRxController):
 
     def test_osd(self, _args):
 
-        def test():
-            message = 'ROTORHAZARD'
-            for row in range(HARDWARE_SETTINGS['hdzero']['column_size']):
+        message = 'ROTORHAZARD'
+        hdzero = self.make_pilot_settings('hdzero')
+        rows = hdzero.column_size
+        start_col = self.centerOSD(len(message), hdzero)
+        clear_row_frames = hdzero.frame_clear_row
+
+        # A new test replaces one still running, so its clears don't wipe this one
+        self.cancel_frames_later(self._test_osd_frames)
+        # The test draws over every row, lap rows included
+        self._lap_msgs = {}
+        test_frames = []
+        for row in range(rows):
+
+            test_frames.append(self.send_frames_later(row * 0.5, [
+                OSD_CLEAR_FRAME,
+                self.osd_text_frame(row, start_col, message),
+                OSD_DISPLAY_FRAME,
+            ]))
+
+            test_frames.append(self.send_frames_later((row + 1) * 0.5, [
+                clear_row_frames[row],
+                OSD_DISPLAY_FRAME,
+            ]))
+
+        test_frames.append(self.send_frames_later(rows * 0.5 + 1, [
+            OSD_CLEAR_FRAME,
+            OSD_DISPLAY_FRAME,
+        ]))
+        self._test_osd_frames = test_frames
 
-                with self._queue_lock:
-                    self.send_clear()
-                    start_col = self.centerOSD(len(message), 'hdzero')
-                    self.send_msg(row, start_col, message)    
-                    self.send_display()
+    #
+    # VRxC Event Triggers
+    #
 
-                time.sleep(0.5)
+    def load_pilot_settings(self, pilot_id):
+        hardware_type = self._rhapi.db.pilot_attribute_value(pilot_id, 'hardware_type')
+        if hardware_type not in HARDWARE_SETTINGS:
+            return None
 
-                with self._queue_lock:
-                    self.send_clear_row(row, 'hdzero')
-                    self.send_display()
+        logger.info("Pilot %s's hardware set to %s", pilot_id, hardware_type)
 
-            time.sleep(1)
-            with self._queue_lock:
-                self.send_clear()
-                self.send_display()
+        bindphrase = self._rhapi.db.pilot_attribute_value(pilot_id, 'comm_elrs')
+        if bindphrase:
+            UID = self.hash_phrase(bindphrase)
+        else:
+            UID = self.hash_phrase(self._rhapi.db.pilot_by_id(pilot_id).callsign)
 
-        Thread(target=test, daemon=True).start()
+        logger.info("Pilot %s's UID set to %s", pilot_id, list(UID))
+        return self.make_pilot_settings(hardware_type, UID)
 
-    #
-    # VRxC Event Triggers
-    #
+    def get_pilot_settings(self, pilot_id):
+        # Pilots without backpack hardware are cached as None
+        if pilot_id not in self._pilot_settings:
+            self._pilot_settings[pilot_id] = self.load_pilot_settings(pilot_id)
+        return self._pilot_settings[pilot_id]
 
     def onPilotAlter(self, args):
         pilot_id = args['pilot_id']
-        with self._queue_lock:
+        with self._config_lock:
+            self._pilot_settings.pop(pilot_id, None)
+            self._lap_msgs.pop(pilot_id, None)
 
             if pilot_id in self._heat_data:
-                pilot_settings = {}
-
-                hardware_type = self._rhapi.db.pilot_attribute_value(pilot_id, 'hardware_type')
-                logger.info(f"Pilot {pilot_id}'s hardware set to {hardware_type}")
-                if hardware_type in HARDWARE_SETTINGS:
-                    pilot_settings['hardware_type'] = hardware_type
-                else:
-                    self._heat_data[pilot_id] = None
-                    return
-
-                bindphrase = self._rhapi.db.pilot_attribute_value(pilot_id, 'comm_elrs')
-                if bindphrase:
-                    UID = self.hash_phrase(bindphrase)
-                    pilot_settings['UID'] = UID
-                else:
-                    UID = self.hash_phrase(self._rhapi.db.pilot_by_id(pilot_id).callsign)
-                    pilot_settings['UID'] = UID
-
-                self._heat_data[pilot_id] = pilot_settings
-                logger.info(f"Pilot {pilot_id}'s UID set to {UID}")
+                self._heat_data[pilot_id] = self.get_pilot_settings(pilot_id)
+                self.update_active_pilots()
+
+    def onPilotDelete(self, args):
+        # Leave the heat alone; a deleted pilot has no slot in it
+        with self._config_lock:
+            self._pilot_settings.pop(args['pilot_id'], None)
+
+    def reset_pilot_settings(self):
+        # Pilot ids can be reused by a different pilot after a database
+        # reset or restore, so nothing cached by id can be trusted
+        with self._config_lock:
+            self._pilot_settings = {}
+            self._heat_data = {}
+            self._active_pilots = ()
 
     def onHeatSet(self, args):
 
         heat_data = {}
         for slot in self._rhapi.db.slots_by_heat(args['heat_id']):
             if slot.pilot_id:
-                hardware_type = self._rhapi.db.pilot_attribute_value(slot.pilot_id, 'hardware_type')
-                if hardware_type not in HARDWARE_SETTINGS:
-                    heat_data[slot.pilot_id] = None
-                    continue
-
-                pilot_settings = {}
-                pilot_settings['hardware_type'] = hardware_type
-                logger.info(f"Pilot {slot.pilot_id}'s hardware set to {self._rhapi.db.pilot_attribute_value(slot.pilot_id, 'hardware_type')}")
+                heat_data[slot.pilot_id] = self.get_pilot_settings(slot.pilot_id)
 
-                bindphrase = self._rhapi.db.pilot_attribute_value(slot.pilot_id, 'comm_elrs')
-                if bindphrase:
-                    UID = self.hash_phrase(bindphrase)
-                    pilot_settings['UID'] = UID
-                else:
-                    UID = self.hash_phrase(self._rhapi.db.pilot_by_id(slot.pilot_id).callsign)
-                    pilot_settings['UID'] = UID
-                
-                heat_data[slot.pilot_id] = pilot_settings
-                logger.info(f"Pilot {slot.pilot_id}'s UID set to {UID}")
-        
         self._heat_data = heat_data
+        self.update_active_pilots()
+
+    def update_active_pilots(self):
+        self._active_pilots = tuple(
+            (pilot_id, pilot_settings) for pilot_id, pilot_settings in self._heat_data.items() if pilot_settings
+        )
+
+    def get_race_name(self, heat_id):
+        heat = self._rhapi.db.heat_by_id(heat_id)
+        if not heat or not heat.name:
+            return None
+        heat_name = heat.name.upper()
+
+        raceclass = self._rhapi.db.raceclass_by_id(heat.class_id) if heat.class_id else None
+        if not raceclass or not raceclass.name:
+            return f'x {heat_name} w'
+        class_name = raceclass.name.upper()
+
+        round_num = self._rhapi.db.heat_max_round(heat_id) + 1
+        if round_num > 1:
+            round_trans = self._rhapi.__('Round').upper()
+            return f'x {class_name} | {heat_name} | {round_trans} {round_num} w'
+        return f'x {class_name} | {heat_name} w'
 
     def onRaceStage(self, args):
-        # Set OSD options
-        self.setOptions()
 
         # Setup heat if not done already
-        with self._queue_lock:
-            self.clear_sendUID()
-            self._finished_pilots = []
+        with self._config_lock:
+            self._finished_pilots = set()
+            self._lap_msgs = {}
             if not self._heat_data:
                 self.onHeatSet(args)
 
-        heat_data = self._rhapi.db.heat_by_id(args['heat_id'])
-        if heat_data:
-            class_id = heat_data.class_id
-            heat_name = heat_data.name
-        else:
-            class_id = None
-            heat_name = None
-        if class_id:
-            raceclass = self._rhapi.db.raceclass_by_id(class_id)
-        else:
-            raceclass = None
-        if raceclass:
-            class_name = raceclass.name
-        else:
-            class_name = None
-        if self._heat_name and heat_data and class_name and heat_name:
-            round_trans = self._rhapi.__('Round')
-            round_num = self._rhapi.db.heat_max_round(args['heat_id']) + 1
-            if round_num > 1:
-                race_name = f'x {class_name.upper()} | {heat_name.upper()} | {round_trans.upper()} {round_num} w'
-            else:
-                race_name = f'x {class_name.upper()} | {heat_name.upper()} w'
-        elif self._heat_name and heat_data and heat_name:
-            race_name = f'x {heat_name.upper()} w'
+        active_pilots = self._active_pilots
+        if not active_pilots:
+            return
+
+        # Options are kept current by OPTION_SET
+        cfg = self.get_config()
+
+        race_name = self.get_race_name(args['heat_id']) if cfg.heat_name else None
 
         # Send stage message to all pilots
-        def arm(pilot_id):
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear()
-                start_col1 = self.centerOSD(len(self._racestage_message), self._heat_data[pilot_id]['hardware_type'])
-                self.send_msg(self._status_row, start_col1, self._racestage_message)
-                if self._heat_name and heat_name:
-                    start_col2 = self.centerOSD(len(race_name), self._heat_data[pilot_id]['hardware_type'])
-                    self.send_msg(self._announcement_row, start_col2, race_name)
-                self.send_display()
-                self.clear_sendUID()
-
-        with self._queue_lock:
-            for pilot_id in self._heat_data:
-                if self._heat_data[pilot_id]:
-                    Thread(target=arm, args=(pilot_id,), daemon=True).start()
+        frames = [CLEAR_SEND_UID_FRAME]
+        stage_msgs = {}
+        race_name_msgs = {}
+        for _pilot_id, pilot_settings in active_pilots:
+            stage_frames = [
+                OSD_CLEAR_FRAME,
+                self.centered_msg(cfg.status_row, cfg.racestage_message, pilot_settings, stage_msgs),
+            ]
+            if race_name:
+                stage_frames.append(self.centered_msg(cfg.announcement_row, race_name, pilot_settings, race_name_msgs))
+            frames.append(self.pilot_burst(pilot_settings, *stage_frames))
+
+        self.send_frames(frames)
+
+    def send_status_message(self, cfg:osdConfig, message, uptime=None, clear_osd=False, clear_row=False, skip_finished=False):
+        active_pilots = self._active_pilots
+        if not active_pilots:
+            return
+
+        if clear_osd or clear_row:
+            self._lap_msgs = {}
+
+        frames = []
+        clear_frames = []
+        status_msgs = {}
+        finished_pilots = self._finished_pilots if skip_finished else ()
+        for pilot_id, pilot_settings in active_pilots:
+            if pilot_id in finished_pilots:
+                continue
+
+            status_frames = []
+            if clear_osd:
+                status_frames.append(OSD_CLEAR_FRAME)
+            status_frames.append(self.centered_msg(cfg.status_row, message, pilot_settings, status_msgs, full_row=clear_row))
+            frames.append(self.pilot_burst(pilot_settings, *status_frames))
+
+            if uptime is not None:
+                clear_frames.append(self.pilot_burst(pilot_settings,
+                    self.pilot_clear_row(pilot_settings, cfg.status_row),
+                ))
+
+        self.send_frames(frames)
+        if uptime is not None:
+            self.send_frames_later(uptime, clear_frames)
 
     def onRaceStart(self, _args):
-        
-        def start(pilot_id):
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear()
-                start_col = self.centerOSD(len(self._racestart_message), self._heat_data[pilot_id]['hardware_type'])
-                self.send_msg(self._status_row, start_col, self._racestart_message)  
-                self.send_display()
-                self.clear_sendUID()
-                delay = copy.copy(self._racestart_uptime)
-
-            time.sleep(delay)
-
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear_row(self._status_row, self._heat_data[pilot_id]['hardware_type'])
-                self.send_display()
-                self.clear_sendUID()
-
-        with self._queue_lock:
-            for pilot_id in self._heat_data:
-                if self._heat_data[pilot_id]:
-                    thread1 = Thread(target=start, args=(pilot_id,), daemon=True)
-                    thread1.start()
+        cfg = self.get_config()
+        self.send_status_message(cfg, cfg.racestart_message, cfg.racestart_uptime, clear_osd=True)
 
     def onRaceFinish(self, _args):
-        
-        def start(pilot_id):
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear_row(self._status_row, self._heat_data[pilot_id]['hardware_type'])
-                start_col = self.centerOSD(len(self._racefinish_message), self._heat_data[pilot_id]['hardware_type'])
-                self.send_msg(self._status_row, start_col, self._racefinish_message)  
-                self.send_display()
-                self.clear_sendUID()
-                delay = copy.copy(self._finish_uptime)
-
-            time.sleep(delay)
-
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear_row(self._status_row, self._heat_data[pilot_id]['hardware_type'])
-                self.send_display()
-                self.clear_sendUID()
-
-        with self._queue_lock:
-            for pilot_id in self._heat_data:
-                if self._heat_data[pilot_id] and (pilot_id not in self._finished_pilots):
-                    Thread(target=start, args=(pilot_id,), daemon=True).start()
+        cfg = self.get_config()
+        self.send_status_message(cfg, cfg.racefinish_message, cfg.finish_uptime, clear_row=True, skip_finished=True)
 
     def onRaceStop(self, _args):
+        cfg = self.get_config()
+        self.send_status_message(cfg, cfg.racestop_message, skip_finished=True)
 
-        def land(pilot_id):
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                start_col = self.centerOSD(len(self._racestop_message), self._heat_data[pilot_id]['hardware_type'])
-                self.send_msg(self._status_row, start_col, self._racestop_message) 
-                self.send_display()
-                self.clear_sendUID()
+    def onRaceLapRecorded(self, args):
 
-        with self._queue_lock:
-            for pilot_id in self._heat_data:
-                if self._heat_data[pilot_id] and (pilot_id not in self._finished_pilots):
-                    Thread(target=land, args=(pilot_id,), daemon=True).start()
+        cfg = self.get_config()
+        heat_data = self._heat_data
+        lap_msgs = self._lap_msgs
 
-    def onRaceLapRecorded(self, args):
+        # Other messages drawn on the lap row would leave a skipped row stale
+        skip_unchanged = cfg.currentlap_row not in (cfg.status_row, cfg.lapresults_row, cfg.announcement_row)
 
-        def update_pos(result):
-            pilot_id = result['pilot_id']
+        def update_pos(result, pilot_settings):
+            if not cfg.position_mode or len(heat_data) == 1:
+                message = f"LAP: {result['laps'] + 1}"
+            else:
+                message = f"POSN: {str(result['position']).upper()} | LAP: {result['laps'] + 1}"
+
+            # Row already shows this pilot's position and lap
+            if skip_unchanged and lap_msgs.get(result['pilot_id']) == message:
+                return None
+            lap_msgs[result['pilot_id']] = message
+
+            start_col = self.centerOSD(len(message), pilot_settings)
+
+            return self.pilot_burst(pilot_settings,
+                self.osd_row_frame(cfg.currentlap_row, start_col, message, pilot_settings),
+            )
+
+        def lap_results(gap_info, pilot_settings):
+            if not cfg.gap_mode or len(heat_data) == 1:
+                formatted_time = RHUtils.time_format(gap_info.current.last_lap_time, '{m}:{s}.{d}')
+                message = f"x LAP {gap_info.current.lap_number} | {formatted_time} w"
+            elif gap_info.next_rank.position:
+                formatted_time = RHUtils.time_format(gap_info.next_rank.diff_time, '{m}:{s}.{d}')
+                formatted_callsign = str.upper(gap_info.next_rank.callsign)
+                message = f"x {formatted_callsign} | +{formatted_time} w"
+            else:
+                message = cfg.leader_message
+            start_col = self.centerOSD(len(message), pilot_settings)
 
-            with self._queue_lock:
-                if not self._position_mode or len(self._heat_data) == 1:
-                    message = f"LAP: {result['laps'] + 1}"
-                else:
-                    message = f"POSN: {str(result['position']).upper()} | LAP: {result['laps'] + 1}"
-                start_col = self.centerOSD(len(message), self._heat_data[pilot_id]['hardware_type'])
+            return self.pilot_burst(pilot_settings,
+                self.osd_text_frame(cfg.lapresults_row, start_col, message),
+            )
 
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear_row(self._currentlap_row, self._heat_data[pilot_id]['hardware_type'])
-                
-                self.send_msg(self._currentlap_row, start_col, message) 
-                self.send_display()
-                self.clear_sendUID()
+        if args['pilot_done_flag']:
+            self._finished_pilots.add(args['pilot_id'])
 
-        def lap_results(result, gap_info):
-            pilot_id = result['pilot_id']
+        if not self._active_pilots:
+            return
 
-            with self._queue_lock:
-                if not self._gap_mode or len(self._heat_data) == 1:
-                    formatted_time = RHUtils.time_format(gap_info.current.last_lap_time, '{m}:{s}.{d}')
-                    message = f"x LAP {gap_info.current.lap_number} | {formatted_time} w"
-                elif gap_info.next_rank.position:
-                    formatted_time = RHUtils.time_format(gap_info.next_rank.diff_time, '{m}:{s}.{d}')
-                    formatted_callsign = str.upper(gap_info.next_rank.callsign)
-                    message = f"x {formatted_callsign} | +{formatted_time} w"
-                else:
-                    message = self._leader_message
-                start_col = self.centerOSD(len(message), self._heat_data[pilot_id]['hardware_type'])
-            
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_msg(self._lapresults_row, start_col, message)
-                self.send_display()
-                self.clear_sendUID()
-                delay = copy.copy(self._results_uptime)
-
-            time.sleep(delay)
-
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear_row(self._lapresults_row, self._heat_data[pilot_id]['hardware_type'])
-                self.send_display()
-                self.clear_sendUID()
-
-        with self._queue_lock:
-            if self._heat_data == {}:
+        # Nothing would be sent
+        with self._connector_status_lock:
+            if not self._backpack_connected:
                 return
 
-            if args['pilot_done_flag']:
-                self._finished_pilots.append(args['pilot_id'])
+        frames = []
+        clear_frames = []
+        finished_pilots = self._finished_pilots
+        results = args['results']['by_race_time']
+        for result in results:
+            pilot_id = result['pilot_id']
+            pilot_settings = heat_data.get(pilot_id)
+            if not pilot_settings:
+                continue
+
+            if pilot_id not in finished_pilots:
+                frame = update_pos(result, pilot_settings)
+                if frame:
+                    frames.append(frame)
 
-            results = args['results']['by_race_time']
-            for result in results:
-                if self._heat_data[result['pilot_id']]:
-                    
-                    if result['pilot_id'] not in self._finished_pilots:
-                        Thread(target=update_pos, args=(result,), daemon=True).start()
+            if (pilot_id == args['pilot_id']) and (result['laps'] > 0):
+                frames.append(lap_results(args['gap_info'], pilot_settings))
+                clear_frames.append(self.pilot_burst(pilot_settings,
+                    self.pilot_clear_row(pilot_settings, cfg.lapresults_row),
+                ))
 
-                    if (result['pilot_id'] == args['pilot_id']) and (result['laps'] > 0):
-                        Thread(target=lap_results, args=(result, args['gap_info']), daemon=True).start()
+        self.send_frames(frames)
+        self.send_frames_later(cfg.results_uptime, clear_frames)
     
     def onLapDelete(self, _args):
-        
-        def delete(pilot_id):
-            with self._queue_lock:
-                if self._heat_data[pilot_id]:
-                    self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                    self.send_clear()
-                    self.send_display()
-                    self.clear_sendUID()
-        
-        with self._queue_lock:
-            if self._results_mode:
-                for pilot_id in self._heat_data:
-                    Thread(target=delete, args=(pilot_id,), daemon=True).start()
+
+        active_pilots = self._active_pilots
+        if not active_pilots:
+            return
+
+        cfg = self.get_config()
+
+        if cfg.results_mode:
+            self._lap_msgs = {}
+            frames = []
+            for _pilot_id, pilot_settings in active_pilots:
+                frames.append(self.pilot_burst(pilot_settings,
+                    OSD_CLEAR_FRAME,
+                ))
+
+            self.send_frames(frames)
 
     def onRacePilotDone(self, args):
 
-        def done(result):
+        if not self._active_pilots:
+            return
 
-            with self._queue_lock:
-                pilot_id = result['pilot_id']
-                start_col = self.centerOSD(len(self._pilotdone_message), self._heat_data[pilot_id]['hardware_type'])
-            
-                self.set_sendUID(self._heat_data[result['pilot_id']]['UID'])
-                self.send_clear_row(self._currentlap_row, self._heat_data[pilot_id]['hardware_type'])
-                self.send_clear_row(self._status_row, self._heat_data[pilot_id]['hardware_type'])
-                self.send_msg(self._status_row, start_col, self._pilotdone_message)
-
-                if self._results_mode:
-                    self.send_msg(10, 11, "PLACEMENT:")
-                    self.send_msg(10, 30, str(result['position']))
-                    self.send_msg(11, 11, "LAPS COMPLETED:")
-                    self.send_msg(11, 30, str(result['laps']))
-                    self.send_msg(12, 11, "FASTEST LAP:")
-                    self.send_msg(12, 30, result['fastest_lap'])
-                    self.send_msg(13, 11, "FASTEST " + str(result['consecutives_base']) +  " CONSEC:")
-                    self.send_msg(13, 30, result['consecutives'])
-                    self.send_msg(14, 11, "TOTAL TIME:")
-                    self.send_msg(14, 30, result['total_time'])
-                
-                self.send_display()
-                self.clear_sendUID()
-                delay = copy.copy(self._finish_uptime)
+        cfg = self.get_config()
+        heat_data = self._heat_data
 
-            time.sleep(delay)
+        def done(result, pilot_settings):
+            start_col = self.centerOSD(len(cfg.pilotdone_message), pilot_settings)
+        
+            frames = [
+                self.pilot_clear_row(pilot_settings, cfg.currentlap_row),
+                self.osd_row_frame(cfg.status_row, start_col, cfg.pilotdone_message, pilot_settings),
+            ]
+
+            if cfg.results_mode:
+                frames += [
+                    self.result_row_frame(10, PLACEMENT_LABEL, result['position']),
+                    self.result_row_frame(11, LAPS_COMPLETED_LABEL, result['laps']),
+                    self.result_row_frame(12, FASTEST_LAP_LABEL, result['fastest_lap']),
+                    self.result_row_frame(13, result_label(f"FASTEST {result['consecutives_base']} CONSEC:"), result['consecutives']),
+                    self.result_row_frame(14, TOTAL_TIME_LABEL, result['total_time']),
+                ]
+            
+            return self.pilot_burst(pilot_settings, *frames)
 
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear_row(self._status_row, self._heat_data[pilot_id]['hardware_type'])
-                self.send_display()
-                self.clear_sendUID()
+        pilot_id = args['pilot_id']
+        pilot_settings = heat_data.get(pilot_id)
+        if not pilot_settings:
+            return
 
         results = args['results']['by_race_time']
-        with self._queue_lock:
-            for result in results:
-                if (self._heat_data[args['pilot_id']]) and (result['pilot_id'] == args['pilot_id']):
-                    Thread(target=done, args=(result,), daemon=True).start()
-                    break
+        result = next((result for result in results if result['pilot_id'] == pilot_id), None)
+        if result is None:
+            return
+
+        self.send_frames([done(result, pilot_settings)])
+        self.send_frames_later(cfg.finish_uptime, [
+            self.pilot_burst(pilot_settings,
+                self.pilot_clear_row(pilot_settings, cfg.status_row),
+            ),
+        ])
 
     def onLapsClear(self, _args):
-        
-        def clear(pilot_id):
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot_id]['UID'])
-                self.send_clear()
-                self.send_display()
-                self.clear_sendUID()
-
-        with self._queue_lock:
-            self._finished_pilots = []
-            for pilot_id in self._heat_data:
-                if self._heat_data[pilot_id]:
-                    Thread(target=clear, args=(pilot_id,), daemon=True).start()
+
+        self._finished_pilots = set()
+        self._lap_msgs = {}
+
+        active_pilots = self._active_pilots
+        if not active_pilots:
+            return
+
+        frames = []
+        for _pilot_id, pilot_settings in active_pilots:
+            frames.append(self.pilot_burst(pilot_settings,
+                OSD_CLEAR_FRAME,
+            ))
+
+        self.send_frames(frames)
 
     def onSendMessage(self, args):
-        
-        def notify(pilot):
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot]['UID'])
-                start_col = self.centerOSD(len(args['message']), self._heat_data[pilot]['hardware_type'])
-                self.send_msg(self._announcement_row, start_col, str.upper(args['message']))
-                self.send_display()
-                self.clear_sendUID()
-                delay = copy.copy(self._announcement_uptime)
-
-            time.sleep(delay)
-
-            with self._queue_lock:
-                self.set_sendUID(self._heat_data[pilot]['UID'])
-                self.send_clear_row(self._announcement_row, self._heat_data[pilot]['hardware_type'])
-                self.send_display()
-                self.clear_sendUID()
-
-        with self._queue_lock:
-            for pilot_id in self._heat_data:
-                if self._heat_data[pilot_id]:
-                    Thread(target=notify, args=(pilot_id,), daemon=True).start()
+
+        active_pilots = self._active_pilots
+        if not active_pilots:
+            return
+
+        cfg = self.get_config()
+
+        message = str.upper(args['message'])
+
+        frames = []
+        clear_frames = []
+        announcement_msgs = {}
+        for _pilot_id, pilot_settings in active_pilots:
+            frames.append(self.pilot_burst(pilot_settings,
+                self.centered_msg(cfg.announcement_row, message, pilot_settings, announcement_msgs),
+            ))
+            clear_frames.append(self.pilot_burst(pilot_settings,
+                self.pilot_clear_row(pilot_settings, cfg.announcement_row),
+            ))
+
+        self.send_frames(frames)
+        self.send_frames_later(cfg.announcement_uptime, clear_frames)
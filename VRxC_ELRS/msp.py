@@ -1,50 +1,52 @@
+import struct
 from dataclasses import dataclass
 
-class msp_message():
-
-    _payload = []
-
-    def _convert_values(self, value):
-        a = value%256
-        b = int(value/256)
-        return [a, b]
-
-    def set_function(self, function):
-        self._function = self._convert_values(function)
-
-    def set_payload(self, payload:list):
-        self._payload = payload
-
-    def _payload_size(self):
-        size = len(self._payload)
-        return self._convert_values(size)
+#
+# CRC8 DVB-S2 lookup table (polynomial 0xD5)
+#
 
-    def _crc8_dvb_s2(self, crc, a):
-        crc = crc ^ a
+def _build_crc8_dvb_s2_table():
+    table = []
+    for value in range(256):
+        crc = value
         for ii in range(8):
             if crc & 0x80:
                 crc = (crc << 1) ^ 0xD5
             else:
                 crc = crc << 1
-        return crc & 0xFF
-    
+        table.append(crc & 0xFF)
+    return bytes(table)
+
+_CRC8_DVB_S2_TABLE = _build_crc8_dvb_s2_table()
+
+def crc8_dvb_s2(body) -> int:
+    crc = 0
+    table = _CRC8_DVB_S2_TABLE
+    for x in body:
+        crc = table[crc ^ x]
+    return crc
+
+class msp_message():
+
+    _function = 0
+    _payload = b''
+
+    def set_function(self, function):
+        self._function = function
+
+    def set_payload(self, payload):
+        self._payload = bytes(payload)
+
     def _calculate_checksum(self, body):
-        crc = 0
-        for x in body:
-            crc = self._crc8_dvb_s2(crc, x)
-        return crc
-
-    def get_msp(self):
-        msp = [ord('$'), ord('X'), ord('<')]
-
-        body = [0]
-        body += self._function
-        body += self._payload_size()
-        body += self._payload
-        
-        checksum = self._calculate_checksum(body)
-        msp += body + [checksum]
-        return msp
+        return crc8_dvb_s2(body)
+
+    def get_msp(self) -> bytes:
+        size = len(self._payload)
+        msp = bytearray(9 + size)
+        struct.pack_into('<3sBHH', msp, 0, b'$X<', 0, self._function, size)
+        msp[8:8 + size] = self._payload
+        msp[-1] = self._calculate_checksum(memoryview(msp)[3:-1])
+        return bytes(msp)
 
 #
 # ExpressLRS Backpack MSPTypes
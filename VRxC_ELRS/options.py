@@ -0,0 +1,60 @@
+from RHUI import UIFieldType
+
+#
+# Plugin Options
+#
+
+def option_checked(value):
+    return value == "1"
+
+def option_value(value):
+    return value
+
+def option_decaseconds(value):
+    return value * 1e-1
+
+SYMBOL_DESC = 'lowercase letters are symbols'
+ROW_DESC = 'Use rows between 0-9 or 15-17'
+
+# (name, label, desc, field_type, default value, conversion of the stored value) for each option
+GENERAL_OPTIONS = (
+    ('_race_control', 'Race Control from Transmitter', 'Allows the race director to remotely control races', UIFieldType.CHECKBOX, None, option_checked),
+)
+
+OSD_OPTIONS = (
+    #
+    # Check Boxes
+    #
+    ('_heat_name', 'Show Race Name on Stage', None, UIFieldType.CHECKBOX, None, option_checked),
+    ('_position_mode', 'Show Current Position and Lap', 'off - only shows current lap', UIFieldType.CHECKBOX, None, option_checked),
+    ('_gap_mode', 'Show Gap Time', 'off - shows lap time', UIFieldType.CHECKBOX, None, option_checked),
+    ('_results_mode', 'Show Post-Race Results', 'Uses rows 10-14', UIFieldType.CHECKBOX, None, option_checked),
+
+    #
+    # Text Fields
+    #
+    ('_racestage_message', 'Race Stage Message', SYMBOL_DESC, UIFieldType.TEXT, "w ARM NOW x", option_value),
+    ('_racestart_message', 'Race Start Message', SYMBOL_DESC, UIFieldType.TEXT, "w   GO!   x", option_value),
+    ('_pilotdone_message', 'Pilot Done Message', SYMBOL_DESC, UIFieldType.TEXT, "w FINISHED! x", option_value),
+    ('_racefinish_message', 'Race Finish Message', SYMBOL_DESC, UIFieldType.TEXT, "w FINISH LAP! x", option_value),
+    ('_racestop_message', 'Race Stop Message', SYMBOL_DESC, UIFieldType.TEXT, "w  LAND NOW!  x", option_value),
+    ('_leader_message', 'Race Leader Message', SYMBOL_DESC, UIFieldType.TEXT, "x RACE LEADER w", option_value),
+
+    #
+    # Basic Integers
+    #
+    ('_racestart_uptime', 'Start Message Uptime', 'decaseconds', UIFieldType.BASIC_INT, 5, option_decaseconds),
+    ('_finish_uptime', 'Finish Message Uptime', 'decaseconds', UIFieldType.BASIC_INT, 20, option_decaseconds),
+    ('_results_uptime', 'Lap Result Uptime', 'decaseconds', UIFieldType.BASIC_INT, 40, option_decaseconds),
+    ('_announcement_uptime', 'Announcement Uptime', 'decaseconds', UIFieldType.BASIC_INT, 50, option_decaseconds),
+    ('_status_row', 'Race Status Row', ROW_DESC, UIFieldType.BASIC_INT, 5, option_value),
+    ('_currentlap_row', 'Current Lap/Position Row', ROW_DESC, UIFieldType.BASIC_INT, 0, option_value),
+    ('_lapresults_row', 'Lap/Gap Results Row', ROW_DESC, UIFieldType.BASIC_INT, 15, option_value),
+    ('_announcement_row', 'Announcement Row', ROW_DESC, UIFieldType.BASIC_INT, 6, option_value),
+)
+
+# Plugin option name -> (osdConfig field, conversion of the stored value)
+OPTION_FIELDS = {
+    name: (name.lstrip('_'), convert)
+    for name, _label, _desc, _field_type, _value, convert in GENERAL_OPTIONS + OSD_OPTIONS
+}